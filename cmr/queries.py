@@ -3,27 +3,324 @@ Contains all CMR query types.
 """
 
 try:
-    from urllib.parse import quote
+    from urllib.parse import urlencode
 except ImportError:
-    from urllib import pathname2url as quote
+    from urllib import urlencode as _urlencode
 
+    def urlencode(query, doseq=False):
+        """
+        Encodes query pairs like Python 3's urlencode(). Python 2's version replaces any
+        non-ASCII character of a unicode value with '?', which CMR reads as a wildcard, so
+        unicode keys and values are encoded as UTF-8 first.
+        """
+
+        def utf8(value):
+            return value.encode("utf-8") if isinstance(value, unicode) else value
+
+        return _urlencode([
+            (utf8(key), [utf8(val) for val in value] if isinstance(value, list) else utf8(value))
+            for key, value in query
+        ], doseq)
+
+try:
+    from orjson import loads as parse_json
+except ImportError:
+    from json import loads
+
+    def parse_json(content):
+        """
+        Parses a UTF-8 encoded JSON document with the standard library parser.
+        """
+
+        return loads(content.decode("utf-8"))
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
 from datetime import datetime
+from io import BytesIO
 from inspect import getmembers, ismethod
-from re import search
-from requests import get, exceptions
+from re import compile as compile_regex, search
+from threading import Lock
+from weakref import WeakKeyDictionary
 
 CMR_OPS = "https://cmr.earthdata.nasa.gov/search/"
 CMR_UAT = "https://cmr.uat.earthdata.nasa.gov/search/"
 CMR_SIT = "https://cmr.sit.earthdata.nasa.gov/search/"
 
+_SPATIAL_KEYS = frozenset(["point", "polygon", "bounding_box", "line"])
+_COLLECTION_KEYS = frozenset(["short_name", "entry_title"])
+_DAY_NIGHT_FLAGS = frozenset(["day", "night", "unspecified"])
+
+# seconds to wait for CMR to accept a connection or send more data before giving up
+_REQUEST_TIMEOUT = 30
+
+# HTTP session shared by every query, created on first use
+_session = None
+_session_lock = Lock()
+
+def _shared_session():
+    """
+    Returns the HTTP session shared by all queries, creating it on first use. Connections to
+    CMR are pooled and kept alive across queries, failed requests are retried with backoff, and
+    brotli compressed responses are accepted when a brotli decoder is installed, even with
+    requests releases older than 2.26.
+
+    :returns: requests.Session instance
+    """
+
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            from requests import Session
+            from requests.adapters import HTTPAdapter
+            from urllib3.util import make_headers
+            from urllib3.util.retry import Retry
+
+            retries = Retry(
+                total=3,
+                backoff_factor=0.2,
+                status_forcelist=(500, 502, 503, 504),
+                raise_on_status=False
+            )
+
+            _session = Session()
+            _session.mount("https://", HTTPAdapter(pool_maxsize=10, max_retries=retries))
+
+            # requests 2.26 and later already send this default; older releases, the newest that
+            # install on Python 3.4 and 3.5, only offer gzip and deflate, so br is added by hand
+            # there, and urllib3 only offers it when brotli is importable
+            _session.headers.update(make_headers(accept_encoding=True))
+
+    return _session
+
+# responses that carry cache validators, per session and then per request, least recently used
+# first; sessions may carry different credentials, so one session's responses are never
+# revalidated through another, and the cache does not keep closed sessions alive
+_RESPONSE_CACHE_BYTES = 32 * 1024 * 1024
+_response_cache = WeakKeyDictionary()
+_response_cache_lock = Lock()
+
+class _CachedPage(object):
+    """
+    The headers and body of a CMR response, kept so the page can be served again when CMR
+    reports that it has not changed. It offers the parts of a response that queries read.
+    """
+
+    __slots__ = ("headers", "content")
+
+    status_code = 200
+
+    def __init__(self, headers, content):
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    @property
+    def raw(self):
+        # a fresh reader each time, so the page can be streamed any number of times
+        return BytesIO(self.content)
+
+    def close(self):
+        pass
+
+class _RecordingReader(object):
+    """
+    Reads a streamed response body on behalf of a parser while keeping a copy of it, handing
+    the complete body to a callback once it has been read to the end. Only read() is offered,
+    so parsers cannot bypass the copy through readinto(), while close() and release_conn()
+    are passed through so the response can still be closed as usual.
+    """
+
+    __slots__ = ("_raw", "_chunks", "_on_complete")
+
+    def __init__(self, raw, on_complete):
+        self._raw = raw
+        self._chunks = []
+        self._on_complete = on_complete
+
+    def read(self, size=-1):
+        data = self._raw.read(size)
+
+        if self._chunks is not None:
+            self._chunks.append(data)
+
+            # reading all that is left, or an empty read that was not a probe, ends the body
+            if size is None or size < 0 or (size and not data):
+                self._on_complete(b"".join(self._chunks))
+                self._chunks = None
+
+        return data
+
+    def close(self):
+        self._raw.close()
+
+    def release_conn(self):
+        release_conn = getattr(self._raw, "release_conn", None)
+        if release_conn is not None:
+            release_conn()
+
+def _cached_response(session, key):
+    """
+    Looks up a page previously cached for a session and marks it as recently used.
+
+    :param session: session the request is made with
+    :param key: request key as built by Query._fetch()
+    :returns: the cached _CachedPage, or None
+    """
+
+    with _response_cache_lock:
+        responses = _response_cache.get(session)
+        if not responses:
+            return None
+
+        response = responses.pop(key, None)
+        if response is not None:
+            responses[key] = response
+
+    return response
+
+def _cache_response(session, key, headers, content):
+    """
+    Caches a page that CMR provided an ETag or Last-Modified header for, evicting the
+    session's least recently used pages once their bodies take up more than
+    _RESPONSE_CACHE_BYTES.
+
+    :param session: session the request was made with
+    :param key: request key as built by Query._fetch()
+    :param headers: headers of the response
+    :param content: complete body of the response
+    """
+
+    if "ETag" not in headers and "Last-Modified" not in headers:
+        return
+
+    with _response_cache_lock:
+        responses = _response_cache.setdefault(session, OrderedDict())
+        responses.pop(key, None)
+        responses[key] = _CachedPage(headers, content)
+
+        size = sum(len(page.content) for page in responses.values())
+        while size > _RESPONSE_CACHE_BYTES:
+            size -= len(responses.popitem(last=False)[1].content)
+
+_ISO_8601_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+_ISO_8601_REGEX = compile_regex(
+    r"([0-9]{4})-([0-9]{2})-([0-9]{2})T([0-9]{2}):([0-9]{2}):([0-9]{2})Z\Z"
+)
+
+def _datetime_to_iso_8601(date):
+    """
+    Formats a datetime-like object as an ISO 8601 string. The fields are formatted directly,
+    which avoids the cost of interpreting a strftime format string on every call.
+
+    :param date: datetime-like object
+    :returns: the date as an ISO 8601 string
+    """
+
+    try:
+        return "{:04d}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}Z".format(
+            date.year, date.month, date.day, date.hour, date.minute, date.second
+        )
+    except AttributeError:
+        # date-only objects have no time fields
+        return date.strftime(_ISO_8601_FORMAT)
+
+def _to_iso_8601(date):
+    """
+    Converts a temporal bound into the ISO 8601 string CMR expects.
+
+    :param date: None, a datetime-like object or an ISO 8601 formatted string
+    :returns: the date as an ISO 8601 string, or an empty string for an open bound
+    """
+
+    if not date:
+        return ""
+
+    # datetime-like objects can be formatted directly
+    if hasattr(date, "strftime"):
+        return _datetime_to_iso_8601(date)
+
+    # otherwise it must already be an ISO 8601 string with sensible field values
+    try:
+        match = _ISO_8601_REGEX.match(date)
+    except TypeError:
+        match = None
+
+    # building a datetime from the fields rejects impossible dates such as February 30th
+    if match:
+        try:
+            datetime(*[int(field) for field in match.groups()])
+        except ValueError:
+            pass
+        else:
+            return date
+
+    raise ValueError("Please provide None, datetime objects, or ISO 8601 formatted strings.")
+
+def _coordinates_to_strings(coordinates):
+    """
+    Flattens (lon, lat) pairs into a list of coordinate strings, converting every value to a
+    float along the way so invalid coordinates are rejected. repr() is used because str()
+    rounds floats to 12 significant digits on Python 2.
+
+    :param coordinates: iterable of (lon, lat) tuples
+    :returns: list of strings alternating longitude and latitude
+    """
+
+    return [repr(float(val)) for lon, lat in coordinates for val in (lon, lat)]
+
+def _same_state(old, new):
+    """
+    Compares two snapshots of query state. Unlike ==, values must also have the same type, as
+    1, 1.0 and True compare equal but are written to the URL differently.
+
+    :param old: earlier state, made of dicts, lists, tuples and scalars
+    :param new: current state
+    :returns: True if both states would produce the same URL
+    """
+
+    if type(old) is not type(new):
+        return False
+
+    if isinstance(old, dict):
+        return len(old) == len(new) and all(
+            key in new and _same_state(val, new[key]) for key, val in old.items()
+        )
+
+    if isinstance(old, (list, tuple)):
+        return len(old) == len(new) and all(map(_same_state, old, new))
+
+    return old == new
+
+def _require_bool(name, value):
+    """
+    Ensures a flag parameter was given as a boolean.
+
+    :param name: name of the parameter, used in the error message
+    :param value: value to check
+    :throws: TypeError if the value is not a bool
+    """
+
+    if not isinstance(value, bool):
+        raise TypeError("{} must be of type bool".format(name))
+
 class Query(object):
     """
     Base class for all CMR queries.
     """
 
-    _base_url = ""
-    _route = ""
-    _format = "json"
+    __slots__ = ("params", "options", "session", "_base_url", "_route", "_format", "_url_cache")
+
     _valid_formats_regex = [
         "json", "xml", "echo10", "iso", "iso19115",
         "csv", "atom", "kml", "native"
@@ -32,44 +329,77 @@ class Query(object):
     def __init__(self, route, mode=CMR_OPS):
         self.params = {}
         self.options = {}
+        self.session = None
+        self._base_url = ""
         self._route = route
+        self._format = "json"
+        self._url_cache = None
         self.mode(mode)
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Releases this query's HTTP session. A session assigned to the query is closed, while
+        the session shared by all queries is left open so other queries keep reusing its
+        pooled connections.
+        """
+
+        if self.session is not None and self.session is not _session:
+            self.session.close()
+
+        self.session = None
+
     def get(self, limit=2000):
         """
         Get all results up to some limit, even if spanning multiple pages.
 
+        Pages fetched earlier through the same session are revalidated with CMR, so an unchanged
+        page costs a 304 instead of the full body, while changed results are always returned.
+
         :limit: The number of results to return
         :returns: query results as a list
         """
 
+        return list(self.iter_results(limit))
+
+    def iter_results(self, limit=2000):
+        """
+        Iterate over all results up to some limit, requesting pages as they are needed. For json
+        queries with ijson installed, each page is parsed while it streams in instead of after
+        the whole response has been read into memory.
+
+        :limit: The number of results to return
+        :returns: generator of query results
+        """
+
         page_size = min(limit, 2000)
         url = self._build_url()
+        stream = self._format == "json" and ijson is not None
 
-        results = []
         page = 1
-        while len(results) < limit:
+        while (page - 1) * page_size < limit:
 
-            response = get(url, params={'page_size': page_size, 'page_num': page})
-
-            try:
-                response.raise_for_status()
-            except exceptions.HTTPError as ex:
-                raise RuntimeError(ex.response.text)
+            response = self._fetch(url, {'page_size': page_size, 'page_num': page}, stream=stream)
 
-            if self._format == "json":
-                latest = response.json()['feed']['entry']
+            if stream:
+                latest = self._stream_entries(response)
             else:
-                latest = [response.text]
+                latest = self._page_results(response)
 
-            if len(latest) == 0:
+            for result in latest:
+                yield result
+
+            # stop once CMR has no more results instead of requesting an empty page
+            if page * page_size >= int(response.headers["CMR-Hits"]):
                 break
 
-            results.extend(latest)
             page += 1
 
-        return results
-
     def hits(self):
         """
         Returns the number of hits the current query will return. This is done by
@@ -80,25 +410,60 @@ class Query(object):
 
         url = self._build_url()
 
-        response = get(url, params={'page_size': 0})
-
-        try:
-            response.raise_for_status()
-        except exceptions.HTTPError as ex:
-            raise RuntimeError(ex.response.text)
+        response = self._fetch(url, {'page_size': 0})
 
         return int(response.headers["CMR-Hits"])
 
-    def get_all(self):
+    def get_all(self, page_size=2000, max_workers=8):
         """
-        Returns all of the results for the query. This will call hits() first to determine how many
-        results their are, and then calls get() with that number. This method could take quite
-        awhile if many requests have to be made.
+        Returns all of the results for the query. The first page reports how many results there
+        are, and the remaining pages are then requested concurrently. This method could still take
+        quite awhile if many requests have to be made.
 
+        :param page_size: number of results to request per page (at most 2000)
+        :param max_workers: maximum number of pages in flight at once
         :returns: query results as a list
         """
 
-        return self.get(self.hits())
+        page_size = min(page_size, 2000)
+        url = self._build_url()
+
+        def fetch_page(page):
+            response = self._fetch(url, {'page_size': page_size, 'page_num': page})
+            return response, self._page_results(response)
+
+        first, results = fetch_page(1)
+        pages = (int(first.headers["CMR-Hits"]) + page_size - 1) // page_size
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for _, latest in executor.map(fetch_page, range(2, pages + 1)):
+                results.extend(latest)
+
+        return results
+
+    @staticmethod
+    def clear_cache():
+        """
+        Discards all cached responses, so subsequent queries download every page in full.
+        """
+
+        with _response_cache_lock:
+            _response_cache.clear()
+
+    @staticmethod
+    def get_many(queries, limit=2000, max_workers=8):
+        """
+        Get the results of several queries concurrently. Each query is run with get() in a
+        worker thread, so the network round trips overlap instead of running one after another.
+
+        :param queries: iterable of Query instances
+        :param limit: The number of results to return for each query
+        :param max_workers: maximum number of queries in flight at once
+        :returns: list of query results, in the same order as the queries
+        """
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda query: query.get(limit), queries))
 
     def parameters(self, **kwargs):
         """
@@ -158,8 +523,7 @@ class Query(object):
         :returns: Query instance
         """
 
-        if not isinstance(online_only, bool):
-            raise TypeError("Online_only must be of type bool")
+        _require_bool("online_only", online_only)
 
         # remove the inverse flag so CMR doesn't crash
         if "downloadable" in self.params:
@@ -182,48 +546,22 @@ class Query(object):
         :returns: GranueQuery instance
         """
 
-        iso_8601 = "%Y-%m-%dT%H:%M:%SZ"
-
-        # process each date into a datetime object
-        def convert_to_string(date):
-            """
-            Returns the argument as an ISO 8601 or empty string.
-            """
-
-            if not date:
-                return ""
-
-            try:
-                # see if it's datetime-like
-                return date.strftime(iso_8601)
-            except AttributeError:
-                try:
-                    # maybe it already is an ISO 8601 string
-                    datetime.strptime(date, iso_8601)
-                    return date
-                except TypeError:
-                    raise ValueError(
-                        "Please provide None, datetime objects, or ISO 8601 formatted strings."
-                    )
-
-        date_from = convert_to_string(date_from)
-        date_to = convert_to_string(date_to)
+        date_from = _to_iso_8601(date_from)
+        date_to = _to_iso_8601(date_to)
 
         # if we have both dates, make sure from isn't later than to
         if date_from and date_to:
             if date_from > date_to:
                 raise ValueError("date_from must be earlier than date_to.")
 
-        # good to go, make sure we have a param list
-        if "temporal" not in self.params:
-            self.params["temporal"] = []
-
-        self.params["temporal"].append("{},{}".format(date_from, date_to))
+        # good to go, add the range to the param list unless it is already there
+        temporal = self.params.setdefault("temporal", [])
+        date_range = "{},{}".format(date_from, date_to)
+        if date_range not in temporal:
+            temporal.append(date_range)
 
         if exclude_boundary:
-            self.options["temporal"] = {
-                "exclude_boundary": True
-            }
+            self._set_option("temporal", "exclude_boundary", True)
 
         return self
 
@@ -258,21 +596,23 @@ class Query(object):
 
     def point(self, lon, lat):
         """
-        Filter by granules that include a geographic point.
+        Filter by granules that include a geographic point. The filter is skipped if either
+        coordinate is None.
 
         :param lon: longitude of geographic point
         :param lat: latitude of geographic point
         :returns: Query instance
         """
 
-        if not lat or not lon:
+        # 0 is a valid coordinate, so only a missing value skips the filter
+        if lon is None or lat is None:
             return self
 
         # coordinates must be a float
         lon = float(lon)
         lat = float(lat)
 
-        self.params['point'] = "{},{}".format(lon, lat)
+        self.params['point'] = "{!r},{!r}".format(lon, lat)
 
         return self
 
@@ -285,32 +625,26 @@ class Query(object):
         :returns: Query instance
         """
 
-        if not coordinates:
+        if coordinates is None:
             return self
-    
-        # make sure we were passed something iterable
+
+        # make sure we were passed a sequence; avoids truth testing so arrays work too
         try:
-            iter(coordinates)
+            if len(coordinates) == 0:
+                return self
         except TypeError:
-            raise ValueError("A line must be an iterable of coordinate tuples. Ex: [(90,90), (91, 90), ...]")
+            raise ValueError("A polygon must be a sequence of coordinate tuples. Ex: [(90,90), (91, 90), ...]")
 
         # polygon requires at least 4 pairs of coordinates
         if len(coordinates) < 4:
             raise ValueError("A polygon requires at least 4 pairs of coordinates.")
 
-        # convert to floats
-        as_floats = []
-        for lon, lat in coordinates:
-            as_floats.extend([float(lon), float(lat)])
-
-        # last point must match first point to complete polygon
-        if as_floats[0] != as_floats[-2] or as_floats[1] != as_floats[-1]:
+        # last point must match first point to complete polygon; checked before converting the rest
+        (first_lon, first_lat), (last_lon, last_lat) = coordinates[0], coordinates[-1]
+        if float(first_lon) != float(last_lon) or float(first_lat) != float(last_lat):
             raise ValueError("Coordinates of the last pair must match the first pair.")
 
-        # convert to strings
-        as_strs = [str(val) for val in as_floats]
-
-        self.params["polygon"] = ",".join(as_strs)
+        self.params["polygon"] = ",".join(_coordinates_to_strings(coordinates))
 
         return self
 
@@ -326,7 +660,7 @@ class Query(object):
         :returns: Query instance
         """
 
-        self.params["bounding_box"] = "{},{},{},{}".format(
+        self.params["bounding_box"] = "{!r},{!r},{!r},{!r}".format(
             float(lower_left_lon),
             float(lower_left_lat),
             float(upper_right_lon),
@@ -344,28 +678,21 @@ class Query(object):
         :returns: Query instance
         """
 
-        if not coordinates:
+        if coordinates is None:
             return self
-        
-        # make sure we were passed something iterable
+
+        # make sure we were passed a sequence; avoids truth testing so arrays work too
         try:
-            iter(coordinates)
+            if len(coordinates) == 0:
+                return self
         except TypeError:
-            raise ValueError("A line must be an iterable of coordinate tuples. Ex: [(90,90), (91, 90), ...]")
+            raise ValueError("A line must be a sequence of coordinate tuples. Ex: [(90,90), (91, 90), ...]")
 
         # need at least 2 pairs of coordinates
         if len(coordinates) < 2:
             raise ValueError("A line requires at least 2 pairs of coordinates.")
 
-        # make sure they're all floats
-        as_floats = []
-        for lon, lat in coordinates:
-            as_floats.extend([float(lon), float(lat)])
-
-        # cast back to string for join
-        as_strs = [str(val) for val in as_floats]
-
-        self.params["line"] = ",".join(as_strs)
+        self.params["line"] = ",".join(_coordinates_to_strings(coordinates))
 
         return self
 
@@ -378,9 +705,8 @@ class Query(object):
         :returns: Query instance
         """
 
-        if not isinstance(downloadable, bool):
-            raise TypeError("Downloadable must be of type bool")
-        
+        _require_bool("downloadable", downloadable)
+
         # remove the inverse flag so CMR doesn't crash
         if "online_only" in self.params:
             del self.params["online_only"]
@@ -397,12 +723,99 @@ class Query(object):
         :returns: Query instance
         """
 
-        entry_title = quote(entry_title)
-
         self.params['entry_title'] = entry_title
 
         return self
 
+    def _fetch(self, url, params, stream=False):
+        """
+        Makes a GET request to CMR with this query's session, which defaults to the session
+        shared by all queries. The requests library is only loaded when a request is made.
+
+        Pages that CMR sent validators for are cached once their body has been read, and
+        repeating the same request revalidates them so an unchanged page costs a 304 instead of
+        the full body. On a 304 the cached page is returned in place of the response.
+
+        :param url: the url to request
+        :param params: additional request parameters such as paging
+        :param stream: whether to defer reading the response body
+        :returns: the response, or a _CachedPage if the page has not changed
+        :throws: RuntimeError if CMR returns an error
+        """
+
+        from requests import exceptions
+
+        if self.session is None:
+            self.session = _shared_session()
+
+        key = (url, tuple(sorted(params.items())))
+        cached = _cached_response(self.session, key)
+
+        headers = {}
+        if cached is not None:
+            if "ETag" in cached.headers:
+                headers["If-None-Match"] = cached.headers["ETag"]
+            if "Last-Modified" in cached.headers:
+                headers["If-Modified-Since"] = cached.headers["Last-Modified"]
+
+        response = self.session.get(
+            url,
+            params=params,
+            stream=stream,
+            headers=headers,
+            timeout=_REQUEST_TIMEOUT
+        )
+
+        if cached is not None and response.status_code == 304:
+            response.close()
+            return cached
+
+        try:
+            response.raise_for_status()
+        except exceptions.HTTPError as ex:
+            raise RuntimeError(ex.response.text)
+
+        session = self.session
+        if not stream:
+            _cache_response(session, key, response.headers, response.content)
+        else:
+            # let urllib3 undo any gzip transfer encoding, and cache the body once it is read
+            response.raw.decode_content = True
+            if "ETag" in response.headers or "Last-Modified" in response.headers:
+                response.raw = _RecordingReader(
+                    response.raw,
+                    lambda content: _cache_response(session, key, response.headers, content)
+                )
+
+        return response
+
+    def _page_results(self, response):
+        """
+        Extracts the results from a buffered page of CMR results.
+
+        :param response: the response for one page
+        :returns: list of json entries, or the response text for other formats
+        """
+
+        if self._format == "json":
+            return parse_json(response.content)['feed']['entry']
+
+        return [response.text]
+
+    def _stream_entries(self, response):
+        """
+        Yields the entries of a streamed json response as they are parsed.
+
+        :param response: response requested with stream=True, or a cached page
+        :returns: generator of entries
+        """
+
+        try:
+            for entry in ijson.items(response.raw, "feed.entry.item", use_float=True):
+                yield entry
+        finally:
+            response.close()
+
     def _build_url(self):
         """
         Builds the URL that will be used to query CMR.
@@ -410,53 +823,62 @@ class Query(object):
         :returns: the url as a string
         """
 
+        # reuse the last URL if the parameters, options, mode and format are all unchanged; they
+        # are compared by type and value so changes made directly to params or options are
+        # picked up too
+        state = (self._base_url, self._format, self.params, self.options)
+        if self._url_cache is not None and _same_state(self._url_cache[0], state):
+            return self._url_cache[1]
+
         # last chance validation for parameters
         if not self._valid_state():
             raise RuntimeError(("Spatial parameters must be accompanied by a collection "
                                 "filter (ex: short_name or entry_title)."))
 
-        # encode params
-        formatted_params = []
-        for key, val in self.params.items():
-
-            # list params require slightly different formatting
-            if isinstance(val, list):
-                for list_val in val:
-                    formatted_params.append("{}[]={}".format(key, list_val))
-            elif isinstance(val, bool):
-                formatted_params.append("{}={}".format(key, str(val).lower()))
-            else:
-                formatted_params.append("{}={}".format(key, val))
-
-        params_as_string = "&".join(formatted_params)
-
-        # encode options
-        formatted_options = []
-        for param_key in self.options:
-            for option_key, val in self.options[param_key].items():
-
-                # all CMR options must be booleans
-                if not isinstance(val, bool):
-                    raise ValueError("parameter '{}' with option '{}' must be a boolean".format(
-                        param_key,
-                        option_key
-                    ))
-
-                formatted_options.append("options[{}][{}]={}".format(
-                    param_key,
-                    option_key,
-                    val
-                ))
-
-        options_as_string = "&".join(formatted_options)
-        res = "{}.{}?{}&{}".format(
-            self._base_url,
-            self._format,
-            params_as_string,
-            options_as_string
+        # list params get a [] suffix and are expanded by urlencode; CMR expects lowercase booleans
+        pairs = [
+            ("{}[]".format(key), val) if isinstance(val, list)
+            else (key, str(val).lower() if isinstance(val, bool) else val)
+            for key, val in self.params.items()
+        ]
+
+        # options were validated as booleans by _set_option()
+        pairs.extend(
+            ("options[{}][{}]".format(param_key, option_key), str(val).lower())
+            for param_key, options in self.options.items()
+            for option_key, val in options.items()
         )
-        res = res.rstrip('&')
-        return res
+
+        # encode everything in a single pass, leaving off the separator if there is nothing to send
+        url = "{}.{}".format(self._base_url, self._format)
+        if pairs:
+            url += "?" + urlencode(pairs, doseq=True)
+
+        # keep a snapshot of the state so later changes to nested lists and dicts are noticed
+        self._url_cache = (deepcopy(state), url)
+
+        return url
+
+    def _set_option(self, parameter, key, value):
+        """
+        Sets an option that modifies how CMR treats a parameter.
+
+        :param parameter: name of the parameter the option applies to
+        :param key: name of the option
+        :param value: value of the option
+        :returns: Query instance
+        """
+
+        # all CMR options must be booleans
+        if not isinstance(value, bool):
+            raise ValueError("parameter '{}' with option '{}' must be a boolean".format(
+                parameter,
+                key
+            ))
+
+        self.options.setdefault(parameter, {})[key] = value
+
+        return self
 
     def _valid_state(self):
         """
@@ -475,17 +897,22 @@ class Query(object):
 
         :param mode: Mode to set the query to target
         :throws: Will throw if provided None
+        :returns: Query instance
         """
         if mode is None:
             raise ValueError("Please provide a valid mode (CMR_OPS, CMR_UAT, CMR_SIT)")
 
         self._base_url = str(mode) + self._route
 
+        return self
+
 class GranuleQuery(Query):
     """
     Class for querying granules from the CMR.
     """
 
+    __slots__ = ()
+
     def __init__(self, mode=CMR_OPS):
         Query.__init__(self, "granules", mode)
 
@@ -500,7 +927,7 @@ class GranuleQuery(Query):
         """
 
         if orbit2:
-            self.params['orbit_number'] = quote('{},{}'.format(str(orbit1), str(orbit2)))
+            self.params['orbit_number'] = '{},{}'.format(str(orbit1), str(orbit2))
         else:
             self.params['orbit_number'] = orbit1
 
@@ -519,7 +946,7 @@ class GranuleQuery(Query):
 
         day_night_flag = day_night_flag.lower()
 
-        if day_night_flag not in ['day', 'night', 'unspecified']:
+        if day_night_flag not in _DAY_NIGHT_FLAGS:
             raise ValueError("day_night_flag must be day, night or unspecified.")
 
         self.params['day_night_flag'] = day_night_flag
@@ -615,12 +1042,9 @@ class GranuleQuery(Query):
     def _valid_state(self):
 
         # spatial params must be paired with a collection limiting parameter
-        spatial_keys = ["point", "polygon", "bounding_box", "line"]
-        collection_keys = ["short_name", "entry_title"]
-
-        if any(key in self.params for key in spatial_keys):
-            if not any(key in self.params for key in collection_keys):
-                return False
+        keys = self.params.keys()
+        if not _SPATIAL_KEYS.isdisjoint(keys) and _COLLECTION_KEYS.isdisjoint(keys):
+            return False
 
         # all good then
         return True
@@ -631,13 +1055,15 @@ class CollectionQuery(Query):
     Class for querying collections from the CMR.
     """
 
+    __slots__ = ()
+
+    _valid_formats_regex = Query._valid_formats_regex + [
+        "dif", "dif10", "opendata", "umm_json", "umm_json_v[0-9]_[0-9]"
+    ]
+
     def __init__(self, mode=CMR_OPS):
         Query.__init__(self, "collections", mode)
 
-        self._valid_formats_regex.extend([
-            "dif", "dif10", "opendata", "umm_json", "umm_json_v[0-9]_[0-9]"
-        ])
-
     def archive_center(self, center):
         """
         Filter by the archive center that maintains the collection.
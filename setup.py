@@ -12,5 +12,13 @@ setup(
     packages=["cmr"],
     install_requires=[
         "requests",
-    ]
+        "futures; python_version < '3'",
+    ],
+    extras_require={
+        "speedups": [
+            "orjson; python_version >= '3.6'",
+            "ijson>=3.1; python_version >= '3'",
+            "brotli",
+        ],
+    }
 )
@@ -17,7 +17,13 @@ class TestCollectionClass(unittest.TestCase):
 
         self.assertIn("keyword", query.params)
         self.assertEqual(query.params["keyword"], "AST_*")
-    
+
+    def test_keyword_unicode_encoded_as_utf8(self):
+        query = CollectionQuery()
+        query.keyword(u"T\u014dhoku")
+
+        self.assertIn("keyword=T%C5%8Dhoku", query._build_url())
+
     def test_valid_formats(self):
         query = CollectionQuery()
         formats = [
@@ -1,7 +1,69 @@
+import io
+import json
 import unittest
 
-from datetime import datetime
-from cmr.queries import GranuleQuery, CMR_OPS
+from datetime import date, datetime
+from cmr.queries import GranuleQuery, CollectionQuery, CMR_OPS, CMR_UAT, _shared_session
+
+
+class ArrayLike(list):
+    """ Coordinate container that, like a numpy array, refuses to be truth tested """
+
+    def __bool__(self):
+        raise ValueError("The truth value of an array with more than one element is ambiguous.")
+
+    __nonzero__ = __bool__
+
+
+class FakeResponse(object):
+    """ Minimal stand-in for a requests.Response holding one page of CMR results """
+
+    def __init__(self, entries, hits, status_code=200, headers=None):
+        self.content = json.dumps({"feed": {"entry": entries}}).encode("utf-8")
+        self.text = self.content.decode("utf-8")
+        self.status_code = status_code
+        self.headers = {"CMR-Hits": str(hits)}
+        self.headers.update(headers or {})
+        self.raw = io.BytesIO(self.content)
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeSession(object):
+    """ Serves pages of fake granules and records the parameters of every request """
+
+    def __init__(self, hits, etag=None):
+        self.hits = hits
+        self.etag = etag
+        self.requests = []
+        self.sent_headers = []
+        self.not_modified = 0
+        self.closed = False
+
+    def get(self, url, params=None, stream=False, headers=None, timeout=None):
+        self.requests.append(params)
+        self.sent_headers.append(headers or {})
+
+        if self.etag is None:
+            validators = {}
+        elif (headers or {}).get("If-None-Match") == self.etag:
+            self.not_modified += 1
+            return FakeResponse([], self.hits, status_code=304)
+        else:
+            validators = {"ETag": self.etag}
+
+        page_size = params["page_size"]
+        start = (params.get("page_num", 1) - 1) * page_size
+        entries = [{"id": i} for i in range(start, min(start + page_size, self.hits))]
+
+        return FakeResponse(entries, self.hits, headers=validators)
+
+    def close(self):
+        self.closed = True
 
 class TestGranuleClass(unittest.TestCase):
 
@@ -22,410 +84,601 @@ class TestGranuleClass(unittest.TestCase):
     platform = "platform"
     granule_ur = "granule_ur"
 
+    def setUp(self):
+        GranuleQuery.clear_cache()
+        self.query = GranuleQuery()
+
+    def tearDown(self):
+        GranuleQuery.clear_cache()
+
     def test_short_name(self):
-        query = GranuleQuery()
-        query.short_name(self.short_name_val)
+        self.query.short_name(self.short_name_val)
 
-        self.assertIn(self.short_name, query.params)
-        self.assertEqual(query.params[self.short_name], self.short_name_val)
+        self.assertIn(self.short_name, self.query.params)
+        self.assertEqual(self.query.params[self.short_name], self.short_name_val)
 
     def test_version(self):
-        query = GranuleQuery()
-        query.version(self.version_val)
+        self.query.version(self.version_val)
 
-        self.assertIn(self.version, query.params)
-        self.assertEqual(query.params[self.version], self.version_val)
+        self.assertIn(self.version, self.query.params)
+        self.assertEqual(self.query.params[self.version], self.version_val)
+
+    # (lon, lat) arguments and the point parameter they should produce
+    point_cases = [
+        ((10, 15.1), "10.0,15.1"),
+        (("-100", "42"), "-100.0,42.0"),
+        ((0, 0), "0.0,0.0"),
+        ((-112.7345678901234, 42.5), "-112.7345678901234,42.5"),
+    ]
 
     def test_point_set(self):
-        query = GranuleQuery()
+        for args, expected in self.point_cases:
+            self.query.point(*args)
 
-        query.point(10, 15.1)
+            self.assertIn(self.point, self.query.params)
+            self.assertEqual(self.query.params[self.point], expected, msg="point{}".format(args))
 
-        self.assertIn(self.point, query.params)
-        self.assertEqual(query.params[self.point], "10.0,15.1")
+    def test_line_keeps_precision(self):
+        self.query.line([(-112.7345678901234, 42.5), (2, 2)])
+        self.assertEqual(self.query.params["line"], "-112.7345678901234,42.5,2.0,2.0")
 
     def test_point_invalid_set(self):
-        query = GranuleQuery()
+        with self.assertRaises(ValueError):
+            self.query.point("invalid", 15.1)
+            self.query.point(10, None)
 
+    def test_point_empty_strings_invalid(self):
         with self.assertRaises(ValueError):
-            query.point("invalid", 15.1)
-            query.point(10, None)
+            self.query.point("", "")
 
-    def test_temporal_invalid_strings(self):
-        query = GranuleQuery()
+    def test_point_none_skipped(self):
+        self.query.point(10, None)
 
+        self.assertNotIn(self.point, self.query.params)
+
+    def test_temporal_invalid_strings(self):
         with self.assertRaises(ValueError):
-            query.temporal("2016", "2016-10-20T01:02:03Z")
-            query.temporal("2016-10-20T01:02:03Z", "2016")
+            self.query.temporal("2016", "2016-10-20T01:02:03Z")
+            self.query.temporal("2016-10-20T01:02:03Z", "2016")
 
-    def test_temporal_invalid_types(self):
-        query = GranuleQuery()
+    def test_temporal_out_of_range_fields(self):
+        values = [
+            "2016-13-10T01:02:03Z", "2016-10-32T01:02:03Z", "2016-02-30T00:00:00Z",
+            "2016-10-10T24:02:03Z", "2016-10-10T01:02:60Z", "0000-10-10T01:02:03Z"
+        ]
+
+        for value in values:
+            with self.assertRaises(ValueError):
+                self.query.temporal(value, None)
 
+        self.assertNotIn("temporal", self.query.params)
+
+    def test_temporal_invalid_types(self):
         with self.assertRaises(ValueError):
-            query.temporal(1, 2)
-            query.temporal(None, None)
+            self.query.temporal(1, 2)
+            self.query.temporal(None, None)
 
     def test_temporal_invalid_date_order(self):
-        query = GranuleQuery()
-
         with self.assertRaises(ValueError):
-            query.temporal(datetime(2016, 10, 12, 10, 55, 7), datetime(2016, 10, 12, 9))
+            self.query.temporal(datetime(2016, 10, 12, 10, 55, 7), datetime(2016, 10, 12, 9))
 
     def test_temporal_set(self):
-        query = GranuleQuery()
-
         # both strings
-        query.temporal("2016-10-10T01:02:03Z", "2016-10-12T09:08:07Z")
-        self.assertIn("temporal", query.params)
-        self.assertEqual(query.params["temporal"][0], "2016-10-10T01:02:03Z,2016-10-12T09:08:07Z")
+        self.query.temporal("2016-10-10T01:02:03Z", "2016-10-12T09:08:07Z")
+        self.assertIn("temporal", self.query.params)
+        self.assertEqual(self.query.params["temporal"][0], "2016-10-10T01:02:03Z,2016-10-12T09:08:07Z")
 
         # string and datetime
-        query.temporal("2016-10-10T01:02:03Z", datetime(2016, 10, 12, 9))
-        self.assertIn("temporal", query.params)
-        self.assertEqual(query.params["temporal"][1], "2016-10-10T01:02:03Z,2016-10-12T09:00:00Z")
+        self.query.temporal("2016-10-10T01:02:03Z", datetime(2016, 10, 12, 9))
+        self.assertIn("temporal", self.query.params)
+        self.assertEqual(self.query.params["temporal"][1], "2016-10-10T01:02:03Z,2016-10-12T09:00:00Z")
 
         # string and None
-        query.temporal(datetime(2016, 10, 12, 10, 55, 7), None)
-        self.assertIn("temporal", query.params)
-        self.assertEqual(query.params["temporal"][2], "2016-10-12T10:55:07Z,")
+        self.query.temporal(datetime(2016, 10, 12, 10, 55, 7), None)
+        self.assertIn("temporal", self.query.params)
+        self.assertEqual(self.query.params["temporal"][2], "2016-10-12T10:55:07Z,")
 
         # both datetimes
-        query.temporal(datetime(2016, 10, 12, 10, 55, 7), datetime(2016, 10, 12, 11))
-        self.assertIn("temporal", query.params)
-        self.assertEqual(query.params["temporal"][3], "2016-10-12T10:55:07Z,2016-10-12T11:00:00Z")
+        self.query.temporal(datetime(2016, 10, 12, 10, 55, 7), datetime(2016, 10, 12, 11))
+        self.assertIn("temporal", self.query.params)
+        self.assertEqual(self.query.params["temporal"][3], "2016-10-12T10:55:07Z,2016-10-12T11:00:00Z")
+
+    def test_temporal_duplicates_ignored(self):
+        self.query.temporal("2016-10-10T01:02:03Z", "2016-10-12T09:08:07Z")
+        self.query.temporal(datetime(2016, 10, 10, 1, 2, 3), "2016-10-12T09:08:07Z")
+        self.assertEqual(self.query.params["temporal"], ["2016-10-10T01:02:03Z,2016-10-12T09:08:07Z"])
+
+    def test_temporal_date_only(self):
+        self.query.temporal(date(2016, 10, 10), date(2016, 10, 12))
+        self.assertEqual(self.query.params["temporal"][0], "2016-10-10T00:00:00Z,2016-10-12T00:00:00Z")
 
     def test_temporal_option_set(self):
-        query = GranuleQuery()
+        self.query.temporal("2016-10-10T01:02:03Z", "2016-10-12T09:08:07Z", exclude_boundary=True)
+        self.assertIn("exclude_boundary", self.query.options["temporal"])
+        self.assertEqual(self.query.options["temporal"]["exclude_boundary"], True)
+        self.assertIn("options%5Btemporal%5D%5Bexclude_boundary%5D=true", self.query._build_url())
 
-        query.temporal("2016-10-10T01:02:03Z", "2016-10-12T09:08:07Z", exclude_boundary=True)
-        self.assertIn("exclude_boundary", query.options["temporal"])
-        self.assertEqual(query.options["temporal"]["exclude_boundary"], True)
+    def test_invalid_option_set(self):
+        with self.assertRaises(ValueError):
+            self.query._set_option("temporal", "exclude_boundary", "yes")
+        self.assertNotIn("temporal", self.query.options)
 
     def test_online_only_set(self):
-        query = GranuleQuery()
-
         # default to True
-        query.online_only()
-        self.assertIn(self.online_only, query.params)
-        self.assertEqual(query.params[self.online_only], True)
+        self.query.online_only()
+        self.assertIn(self.online_only, self.query.params)
+        self.assertEqual(self.query.params[self.online_only], True)
 
         # explicitly set to False
-        query.online_only(False)
+        self.query.online_only(False)
 
-        self.assertIn(self.online_only, query.params)
-        self.assertEqual(query.params[self.online_only], False)
+        self.assertIn(self.online_only, self.query.params)
+        self.assertEqual(self.query.params[self.online_only], False)
 
     def test_online_only_invalid(self):
-        query = GranuleQuery()
-
         with self.assertRaises(TypeError):
-            query.online_only("Invalid Type")
+            self.query.online_only("Invalid Type")
 
-        self.assertNotIn(self.online_only, query.params)
+        self.assertNotIn(self.online_only, self.query.params)
 
     def test_downloadable_set(self):
-        query = GranuleQuery()
-
         # default to True
-        query.downloadable()
+        self.query.downloadable()
 
-        self.assertIn(self.downloadable, query.params)
-        self.assertEqual(query.params[self.downloadable], True)
+        self.assertIn(self.downloadable, self.query.params)
+        self.assertEqual(self.query.params[self.downloadable], True)
 
         # explicitly set to False
-        query.downloadable(False)
+        self.query.downloadable(False)
 
-        self.assertIn(self.downloadable, query.params)
-        self.assertEqual(query.params[self.downloadable], False)
+        self.assertIn(self.downloadable, self.query.params)
+        self.assertEqual(self.query.params[self.downloadable], False)
 
     def test_downloadable_invalid(self):
-        query = GranuleQuery()
-
         with self.assertRaises(TypeError):
-            query.downloadable("Invalid Type")
-        self.assertNotIn(self.downloadable, query.params)
+            self.query.downloadable("Invalid Type")
+        self.assertNotIn(self.downloadable, self.query.params)
     
     def test_flags_invalidate_the_other(self):
-        query = GranuleQuery()
-
         # if downloadable is set, online_only should be unset
-        query.downloadable()
-        self.assertIn(self.downloadable, query.params)
-        self.assertNotIn(self.online_only, query.params)
+        self.query.downloadable()
+        self.assertIn(self.downloadable, self.query.params)
+        self.assertNotIn(self.online_only, self.query.params)
 
         # if online_only is set, downloadable should be unset
-        query.online_only()
-        self.assertIn(self.online_only, query.params)
-        self.assertNotIn(self.downloadable, query.params)
+        self.query.online_only()
+        self.assertIn(self.online_only, self.query.params)
+        self.assertNotIn(self.downloadable, self.query.params)
 
     def test_entry_title_set(self):
-        query = GranuleQuery()
-        query.entry_title("DatasetId 5")
+        self.query.entry_title("DatasetId 5")
 
-        self.assertIn(self.entry_id, query.params)
-        self.assertEqual(query.params[self.entry_id], "DatasetId%205")
+        self.assertIn(self.entry_id, self.query.params)
+        self.assertEqual(self.query.params[self.entry_id], "DatasetId 5")
 
     def test_orbit_number_set(self):
-        query = GranuleQuery()
-        query.orbit_number(985)
+        self.query.orbit_number(985)
 
-        self.assertIn(self.orbit_number, query.params)
-        self.assertEqual(query.params[self.orbit_number], 985)
+        self.assertIn(self.orbit_number, self.query.params)
+        self.assertEqual(self.query.params[self.orbit_number], 985)
 
     def test_orbit_number_encode(self):
-        query = GranuleQuery()
-        query.orbit_number("985", "986")
+        self.query.orbit_number("985", "986")
 
-        self.assertIn(self.orbit_number, query.params)
-        self.assertEqual(query.params[self.orbit_number], "985%2C986")
+        self.assertIn(self.orbit_number, self.query.params)
+        self.assertEqual(self.query.params[self.orbit_number], "985,986")
 
     def test_day_night_flag_day_set(self):
-        query = GranuleQuery()
-        query.day_night_flag('day')
+        self.query.day_night_flag('day')
 
-        self.assertIn(self.day_night_flag, query.params)
-        self.assertEqual(query.params[self.day_night_flag], 'day')
+        self.assertIn(self.day_night_flag, self.query.params)
+        self.assertEqual(self.query.params[self.day_night_flag], 'day')
 
     def test_day_night_flag_night_set(self):
-        query = GranuleQuery()
-        query.day_night_flag('night')
+        self.query.day_night_flag('night')
 
-        self.assertIn(self.day_night_flag, query.params)
-        self.assertEqual(query.params[self.day_night_flag], 'night')
+        self.assertIn(self.day_night_flag, self.query.params)
+        self.assertEqual(self.query.params[self.day_night_flag], 'night')
 
     def test_day_night_flag_unspecified_set(self):
-        query = GranuleQuery()
-        query.day_night_flag('unspecified')
+        self.query.day_night_flag('unspecified')
 
-        self.assertIn(self.day_night_flag, query.params)
-        self.assertEqual(query.params[self.day_night_flag], 'unspecified')
+        self.assertIn(self.day_night_flag, self.query.params)
+        self.assertEqual(self.query.params[self.day_night_flag], 'unspecified')
 
     def test_day_night_flag_invalid_set(self):
-        query = GranuleQuery()
-
         with self.assertRaises(ValueError):
-            query.day_night_flag('invaliddaynight')
-        self.assertNotIn(self.day_night_flag, query.params)
+            self.query.day_night_flag('invaliddaynight')
+        self.assertNotIn(self.day_night_flag, self.query.params)
 
     def test_day_night_flag_invalid_type_set(self):
-        query = GranuleQuery()
-
         with self.assertRaises(TypeError):
-            query.day_night_flag(True)
-        self.assertNotIn(self.day_night_flag, query.params)
+            self.query.day_night_flag(True)
+        self.assertNotIn(self.day_night_flag, self.query.params)
 
     def test_cloud_cover_min_only(self):
-        query = GranuleQuery()
-        query.cloud_cover(-70)
+        self.query.cloud_cover(-70)
 
-        self.assertIn(self.cloud_cover, query.params)
-        self.assertEqual(query.params[self.cloud_cover], "-70,100")
+        self.assertIn(self.cloud_cover, self.query.params)
+        self.assertEqual(self.query.params[self.cloud_cover], "-70,100")
 
     def test_cloud_cover_max_only(self):
-        query = GranuleQuery()
-        query.cloud_cover("", 120)
+        self.query.cloud_cover("", 120)
 
-        self.assertIn(self.cloud_cover, query.params)
-        self.assertEqual(query.params[self.cloud_cover], ",120")
+        self.assertIn(self.cloud_cover, self.query.params)
+        self.assertEqual(self.query.params[self.cloud_cover], ",120")
 
     def test_cloud_cover_all(self):
-        query = GranuleQuery()
-        query.cloud_cover(-70, 120)
+        self.query.cloud_cover(-70, 120)
 
-        self.assertIn(self.cloud_cover, query.params)
-        self.assertEqual(query.params[self.cloud_cover], "-70,120")
+        self.assertIn(self.cloud_cover, self.query.params)
+        self.assertEqual(self.query.params[self.cloud_cover], "-70,120")
 
     def test_cloud_cover_none(self):
-        query = GranuleQuery()
-        query.cloud_cover()
+        self.query.cloud_cover()
 
-        self.assertIn(self.cloud_cover, query.params)
-        self.assertEqual(query.params[self.cloud_cover], "0,100")
+        self.assertIn(self.cloud_cover, self.query.params)
+        self.assertEqual(self.query.params[self.cloud_cover], "0,100")
 
     def test_instrument(self):
-        query = GranuleQuery()
-
-        query.instrument("1B")
+        self.query.instrument("1B")
 
-        self.assertIn(self.instrument, query.params)
-        self.assertEqual(query.params[self.instrument], "1B")
+        self.assertIn(self.instrument, self.query.params)
+        self.assertEqual(self.query.params[self.instrument], "1B")
 
     def test_empty_instrument(self):
-        query = GranuleQuery()
-
         with self.assertRaises(ValueError):
-            query.instrument(None)
+            self.query.instrument(None)
 
     def test_platform(self):
-        query = GranuleQuery()
-
-        query.platform("1B")
+        self.query.platform("1B")
 
-        self.assertIn(self.platform, query.params)
-        self.assertEqual(query.params[self.platform], "1B")
+        self.assertIn(self.platform, self.query.params)
+        self.assertEqual(self.query.params[self.platform], "1B")
 
     def test_empty_platform(self):
-        query = GranuleQuery()
-
         with self.assertRaises(ValueError):
-            query.platform(None)
+            self.query.platform(None)
 
     def test_granule_ur(self):
-        query = GranuleQuery()
-
-        query.granule_ur("1B")
+        self.query.granule_ur("1B")
 
-        self.assertIn(self.granule_ur, query.params)
-        self.assertEqual(query.params[self.granule_ur], "1B")
+        self.assertIn(self.granule_ur, self.query.params)
+        self.assertEqual(self.query.params[self.granule_ur], "1B")
 
     def test_empty_granule_ur(self):
-        query = GranuleQuery()
-
         with self.assertRaises(ValueError):
-            query.granule_ur(None)
+            self.query.granule_ur(None)
 
     def test_polygon_invalid_set(self):
-        query = GranuleQuery()
+        with self.assertRaises(ValueError):
+            self.query.polygon([1, 2, 3])
+            self.query.polygon([("invalid", 1)])
+            self.query.polygon([(1, 1), (2, 1), (1, 1)])
 
+    def test_polygon_not_closed(self):
         with self.assertRaises(ValueError):
-            query.polygon([1, 2, 3])
-            query.polygon([("invalid", 1)])
-            query.polygon([(1, 1), (2, 1), (1, 1)])
+            self.query.polygon([(1, 1), (2, 1), (2, 2), (1, 2)])
+        self.assertNotIn("polygon", self.query.params)
 
     def test_polygon_set(self):
-        query = GranuleQuery()
+        self.query.polygon([(1, 1), (2, 1), (2, 2), (1, 1)])
+        self.assertEqual(self.query.params["polygon"], "1.0,1.0,2.0,1.0,2.0,2.0,1.0,1.0")
 
-        query.polygon([(1, 1), (2, 1), (2, 2), (1, 1)])
-        self.assertEqual(query.params["polygon"], "1.0,1.0,2.0,1.0,2.0,2.0,1.0,1.0")
+        self.query.polygon([("1", 1.1), (2, 1), (2, 2), (1, 1.1)])
+        self.assertEqual(self.query.params["polygon"], "1.0,1.1,2.0,1.0,2.0,2.0,1.0,1.1")
 
-        query.polygon([("1", 1.1), (2, 1), (2, 2), (1, 1.1)])
-        self.assertEqual(query.params["polygon"], "1.0,1.1,2.0,1.0,2.0,2.0,1.0,1.1")
+    def test_array_like_coordinates(self):
+        self.query.polygon(ArrayLike([(1, 1), (2, 1), (2, 2), (1, 1)]))
+        self.assertEqual(self.query.params["polygon"], "1.0,1.0,2.0,1.0,2.0,2.0,1.0,1.0")
 
-    def test_bounding_box_invalid_set(self):
-        query = GranuleQuery()
+        self.query.line(ArrayLike([(1, 1), (2, 2)]))
+        self.assertEqual(self.query.params["line"], "1.0,1.0,2.0,2.0")
 
+    def test_bounding_box_invalid_set(self):
         with self.assertRaises(ValueError):
-            query.bounding_box(1, 2, 3, "invalid")
+            self.query.bounding_box(1, 2, 3, "invalid")
 
     def test_bounding_box_set(self):
-        query = GranuleQuery()
-
-        query.bounding_box(1, 2, 3, 4)
-        self.assertEqual(query.params["bounding_box"], "1.0,2.0,3.0,4.0")
+        self.query.bounding_box(1, 2, 3, 4)
+        self.assertEqual(self.query.params["bounding_box"], "1.0,2.0,3.0,4.0")
 
     def test_line_invalid_set(self):
-        query = GranuleQuery()
-
         with self.assertRaises(ValueError):
-            query.line("invalid")
-            query.line([(1, 1)])
-            query.line(1)
+            self.query.line("invalid")
+            self.query.line([(1, 1)])
+            self.query.line(1)
 
     def test_line_set(self):
-        query = GranuleQuery()
-
-        query.line([(1, 1), (2, 2)])
-        self.assertEqual(query.params["line"], "1.0,1.0,2.0,2.0")
+        self.query.line([(1, 1), (2, 2)])
+        self.assertEqual(self.query.params["line"], "1.0,1.0,2.0,2.0")
 
-        query.line([("1", 1.1), (2, 2)])
-        self.assertEqual(query.params["line"], "1.0,1.1,2.0,2.0")
+        self.query.line([("1", 1.1), (2, 2)])
+        self.assertEqual(self.query.params["line"], "1.0,1.1,2.0,2.0")
 
     def test_invalid_spatial_state(self):
-        query = GranuleQuery()
-
-        query.point(1, 2)
-        self.assertFalse(query._valid_state())
+        self.query.point(1, 2)
+        self.assertFalse(self.query._valid_state())
 
-        query.polygon([(1, 1), (2, 1), (2, 2), (1, 1)])
-        self.assertFalse(query._valid_state())
+        self.query.polygon([(1, 1), (2, 1), (2, 2), (1, 1)])
+        self.assertFalse(self.query._valid_state())
 
-        query.bounding_box(1, 1, 2, 2)
-        self.assertFalse(query._valid_state())
+        self.query.bounding_box(1, 1, 2, 2)
+        self.assertFalse(self.query._valid_state())
 
-        query.line([(1, 1), (2, 2)])
-        self.assertFalse(query._valid_state())
+        self.query.line([(1, 1), (2, 2)])
+        self.assertFalse(self.query._valid_state())
 
     def test_valid_spatial_state(self):
-        query = GranuleQuery()
+        self.query.point(1, 2).short_name("test")
+        self.assertTrue(self.query._valid_state())
+
+    def test_get_parses_pages(self):
+        query = GranuleQuery().short_name("AST_L1T")
+        query.session = FakeSession(hits=5)
+
+        results = query.get(limit=4)
+
+        self.assertEqual(results, [{"id": i} for i in range(4)])
+
+    def test_get_stops_at_hits(self):
+        query = GranuleQuery().short_name("AST_L1T")
+        query.session = FakeSession(hits=5)
+
+        results = query.get(limit=10)
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual(len(query.session.requests), 1)
+
+    def test_get_other_format_stops_at_hits(self):
+        query = GranuleQuery().short_name("AST_L1T").format("echo10")
+        query.session = FakeSession(hits=5)
+
+        results = query.get(limit=10)
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(len(query.session.requests), 1)
+
+    def test_get_returns_changed_results(self):
+        session = FakeSession(hits=3, etag='"v1"')
+        query = GranuleQuery().short_name("AST_L1T")
+        query.session = session
 
-        query.point(1, 2).short_name("test")
-        self.assertTrue(query._valid_state())
+        query.get(limit=10)[0]["id"] = "changed"
+        self.assertEqual(query.get(limit=10), [{"id": i} for i in range(3)])
+        self.assertEqual(session.not_modified, 1)
+
+        session.hits, session.etag = 5, '"v2"'
+        self.assertEqual(len(query.get(limit=10)), 5)
+
+        other = GranuleQuery().short_name("AST_L1T")
+        other.session = session
+        self.assertEqual(len(other.get(limit=10)), 5)
+        self.assertEqual(session.not_modified, 2)
+
+    def test_get_revalidates_cached_response(self):
+        query = GranuleQuery().short_name("AST_L1T")
+        query.session = FakeSession(hits=3, etag='"abc"')
+
+        first = query.get(limit=10)
+        second = query.get(limit=10)
+
+        self.assertEqual(len(query.session.requests), 2)
+        self.assertNotIn("If-None-Match", query.session.sent_headers[0])
+        self.assertEqual(query.session.sent_headers[1]["If-None-Match"], '"abc"')
+        self.assertEqual(query.session.not_modified, 1)
+        self.assertEqual(second, first)
+        self.assertEqual(len(second), 3)
+
+    def test_cached_responses_kept_per_session(self):
+        query = GranuleQuery().short_name("AST_L1T")
+        query.session = FakeSession(hits=3, etag='"abc"')
+        query.hits()
+
+        query.session = FakeSession(hits=3, etag='"abc"')
+        query.hits()
+
+        self.assertNotIn("If-None-Match", query.session.sent_headers[0])
+
+    def test_streamed_response_revalidated(self):
+        query = GranuleQuery().short_name("AST_L1T")
+        query.session = FakeSession(hits=3, etag='"abc"')
+        url = query._build_url()
+
+        body = query._fetch(url, {"page_size": 10}, stream=True).raw.read()
+        query._fetch(url, {"page_size": 10}, stream=True).raw.read()
+
+        self.assertEqual(query.session.sent_headers[1]["If-None-Match"], '"abc"')
+        cached = query._fetch(url, {"page_size": 10}, stream=True)
+        self.assertEqual(cached.raw.read(), body)
+
+    def test_get_all_fetches_every_page(self):
+        query = GranuleQuery().short_name("AST_L1T")
+        query.session = FakeSession(hits=5)
+
+        results = query.get_all(page_size=2, max_workers=2)
+
+        self.assertEqual(results, [{"id": i} for i in range(5)])
+        self.assertEqual(sorted(params["page_num"] for params in query.session.requests), [1, 2, 3])
+
+    def test_iter_results_is_lazy(self):
+        query = GranuleQuery().short_name("AST_L1T")
+        query.session = FakeSession(hits=5)
+
+        results = query.iter_results(limit=4)
+        self.assertEqual(query.session.requests, [])
+
+        self.assertEqual(next(results), {"id": 0})
+        self.assertEqual(len(query.session.requests), 1)
 
     def _test_get(self):
         """ Test real query """
 
-        query = GranuleQuery()
-        query.short_name('MCD43A4').version('005')
-        query.temporal(datetime(2016, 1, 1), datetime(2016, 1, 1))
-        results = query.get(limit=10)
+        self.query.short_name('MCD43A4').version('005')
+        self.query.temporal(datetime(2016, 1, 1), datetime(2016, 1, 1))
+        results = self.query.get(limit=10)
 
         self.assertEqual(len(results), 10)
     
     def _test_hits(self):
         """ integration test for hits() """
 
-        query = GranuleQuery()
-        query.short_name("AST_L1T").version("003").temporal("2016-10-26T01:30:00Z", "2016-10-26T01:40:00Z")
-        hits = query.hits()
+        self.query.short_name("AST_L1T").version("003").temporal("2016-10-26T01:30:00Z", "2016-10-26T01:40:00Z")
+        hits = self.query.hits()
 
         self.assertEqual(hits, 3)
 
-    def test_invalid_mode(self):
-        query = GranuleQuery()
+    def test_context_manager_closes_session(self):
+        session = FakeSession(hits=0)
+
+        with GranuleQuery() as query:
+            query.session = session
+
+        self.assertTrue(session.closed)
+        self.assertIsNone(query.session)
+
+    def test_context_manager_keeps_shared_session(self):
+        pools = _shared_session().get_adapter(CMR_OPS).poolmanager.pools
+        _shared_session().get_adapter(CMR_OPS).poolmanager.connection_from_url(CMR_OPS)
+
+        with GranuleQuery() as query:
+            query.session = _shared_session()
+
+        self.assertIsNone(query.session)
+        self.assertEqual(len(pools), 1)
+
+    def test_get_many_preserves_order(self):
+        class StubQuery(GranuleQuery):
+            def get(self, limit=2000):
+                return [self.params["short_name"], limit]
+
+        names = ["MOD09GA", "MYD09GA", "AST_L1T", "MCD43A4", "MOD11A1"]
+        queries = [StubQuery().short_name(name) for name in names]
+
+        results = GranuleQuery.get_many(queries, limit=10, max_workers=3)
+        self.assertEqual(results, [[name, 10] for name in names])
+
+    def test_session_created_lazily(self):
+        self.assertIsNone(self.query.session)
 
+    def test_shared_session(self):
+        self.assertIs(_shared_session(), _shared_session())
+        self.assertIn("gzip", _shared_session().headers["Accept-Encoding"])
+
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(self.query, "__dict__"))
+
+    def test_mode_chains(self):
+        query = GranuleQuery().mode(CMR_UAT).short_name("AST_L1T")
+
+        self.assertTrue(query._build_url().startswith(CMR_UAT + "granules.json"))
+
+    def test_invalid_mode(self):
         with self.assertRaises(ValueError):
-            query.mode(None)
+            self.query.mode(None)
 
     def test_invalid_mode_constructor(self):
         with self.assertRaises(ValueError):
             query = GranuleQuery(None)
     
     def test_valid_parameters(self):
-        query = GranuleQuery()
-
-        query.parameters(short_name="AST_L1T", version="003", point=(-100, 42))
+        self.query.parameters(short_name="AST_L1T", version="003", point=(-100, 42))
 
-        self.assertEqual(query.params["short_name"], "AST_L1T")
-        self.assertEqual(query.params["version"], "003")
-        self.assertEqual(query.params["point"], "-100.0,42.0")
+        self.assertEqual(self.query.params["short_name"], "AST_L1T")
+        self.assertEqual(self.query.params["version"], "003")
+        self.assertEqual(self.query.params["point"], "-100.0,42.0")
     
     def test_invalid_parameters(self):
-        query = GranuleQuery()
-
         with self.assertRaises(ValueError):
-            query.parameters(fake=123)
-            query.parameters(point=(-100, "badvalue"))
+            self.query.parameters(fake=123)
+            self.query.parameters(point=(-100, "badvalue"))
 
     def test_valid_formats(self):
-        query = GranuleQuery()
         formats = ["json", "xml", "echo10", "iso", "iso19115", "csv", "atom", "kml", "native"]
 
         for _format in formats:
-            query.format(_format)
-            self.assertEqual(query._format, _format)
+            self.query.format(_format)
+            self.assertEqual(self.query._format, _format)
     
     def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            self.query.format("invalid")
+            self.query.format("jsonn")
+            self.query.format("iso19116")
+
+    def test_collection_formats_not_shared(self):
+        CollectionQuery()
         query = GranuleQuery()
 
         with self.assertRaises(ValueError):
-            query.format("invalid")
-            query.format("jsonn")
-            query.format("iso19116")
+            query.format("dif10")
 
     def test_lowercase_bool_url(self):
-        query = GranuleQuery()
-        query.parameters(short_name="AST_LIT", online_only=True, downloadable=False)
+        self.query.parameters(short_name="AST_LIT", online_only=True, downloadable=False)
 
-        url = query._build_url()
+        url = self.query._build_url()
         self.assertNotIn("True", url)
         self.assertNotIn("False", url)
+
+    def test_build_url_cache_invalidated(self):
+        self.query.short_name("AST_L1T")
+
+        url = self.query._build_url()
+        self.assertIs(self.query._build_url(), url)
+
+        self.query.version("003")
+        self.assertIn("version=003", self.query._build_url())
+
+        self.query.format("xml")
+        self.assertIn(".xml?", self.query._build_url())
+
+    def test_build_url_sees_direct_param_changes(self):
+        self.query.short_name("AST_L1T").temporal("2016-10-10T01:02:03Z", None)
+        self.query._build_url()
+
+        self.query.params["version"] = "003"
+        self.query.params["temporal"].append("2016-10-12T01:02:03Z,")
+        self.query.options["temporal"] = {"and": True}
+
+        url = self.query._build_url()
+        self.assertIn("version=003", url)
+        self.assertIn("temporal%5B%5D=2016-10-12T01%3A02%3A03Z%2C", url)
+        self.assertIn("options%5Btemporal%5D%5Band%5D=true", url)
+
+    def test_build_url_sees_direct_type_changes(self):
+        self.query.short_name("AST_L1T")
+        self.query.params["online_only"] = 1
+        self.assertIn("online_only=1", self.query._build_url())
+
+        self.query.params["online_only"] = True
+        self.assertIn("online_only=true", self.query._build_url())
+
+    def test_build_url_without_params(self):
+        self.assertEqual(self.query._build_url(), CMR_OPS + "granules.json")
+
+    def test_build_url_encodes_values(self):
+        self.query.entry_title("DatasetId 5").orbit_number("985", "986")
+        self.query.temporal("2016-10-10T01:02:03Z", None)
+        self.query.point(10, 15.1)
+
+        url = self.query._build_url()
+        self.assertNotIn("%25", url)
+        self.assertIn("point=10.0%2C15.1", url)
+        self.assertIn("entry_title=DatasetId+5", url)
+        self.assertIn("orbit_number=985%2C986", url)
+        self.assertIn("temporal%5B%5D=2016-10-10T01%3A02%3A03Z%2C", url)
+
+    def test_build_url_repeats_list_params(self):
+        self.query.concept_id(["C1299783579-LPDAAC_ECS", "G1441380236-PODAAC"])
+
+        url = self.query._build_url()
+        self.assertIn("concept_id%5B%5D=C1299783579-LPDAAC_ECS", url)
+        self.assertIn("concept_id%5B%5D=G1441380236-PODAAC", url)
     
     def test_valid_concept_id(self):
-        query = GranuleQuery()
-
-        query.concept_id("C1299783579-LPDAAC_ECS")
-        self.assertEqual(query.params["concept_id"], ["C1299783579-LPDAAC_ECS"])
+        self.query.concept_id("C1299783579-LPDAAC_ECS")
+        self.assertEqual(self.query.params["concept_id"], ["C1299783579-LPDAAC_ECS"])
         
-        query.concept_id(["C1299783579-LPDAAC_ECS", "G1441380236-PODAAC"])
-        self.assertEqual(query.params["concept_id"], ["C1299783579-LPDAAC_ECS", "G1441380236-PODAAC"])
+        self.query.concept_id(["C1299783579-LPDAAC_ECS", "G1441380236-PODAAC"])
+        self.assertEqual(self.query.params["concept_id"], ["C1299783579-LPDAAC_ECS", "G1441380236-PODAAC"])
 